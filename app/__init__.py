@@ -30,6 +30,9 @@ Usage as CLI:
     uv run python -m app monitor  # Monitor in real-time
 """
 
+import atexit
+import logging
+
 from src.e_stop_manager import EStopManager, EStopMode, EStopState
 
 # Version info
@@ -37,6 +40,8 @@ __version__ = "0.1.0"
 __author__ = "E-Stop Manager"
 __description__ = "Emergency stop control via GPIO"
 
+logger = logging.getLogger(__name__)
+
 # Public API exports
 __all__ = [
     "EStopManager",
@@ -59,9 +64,38 @@ def create_e_stop_manager(gpio_pin: int = 4, mode: EStopMode = EStopMode.NC) ->
     return EStopManager(gpio_pin=gpio_pin, mode=mode)
 
 
+# Managers shared by the quick_* helpers, keyed by GPIO pin; each is created
+# on first use and set to its safe state at interpreter exit
+_shared_managers = {}
+
+
+def _cleanup_shared_managers():
+    """Set every shared manager to its safe state and release its GPIO"""
+    for gpio_pin, manager in _shared_managers.items():
+        # One failing manager must not leave the others' pins driven
+        try:
+            manager.cleanup()
+        except Exception as e:
+            logger.error(f"Error cleaning up e-stop manager on GPIO pin {gpio_pin}: {e}")
+    _shared_managers.clear()
+
+
+def _shared_manager(gpio_pin: int) -> EStopManager:
+    """Get or create the EStopManager shared by the quick_* helpers for a pin"""
+    manager = _shared_managers.get(gpio_pin)
+    if manager is None:
+        first = not _shared_managers
+        manager = _shared_managers[gpio_pin] = EStopManager(gpio_pin=gpio_pin)
+        if first:
+            # Registered after the manager (and so gpiozero's own atexit hook)
+            # exists, so that it runs before gpiozero closes the devices
+            atexit.register(_cleanup_shared_managers)
+    return manager
+
+
 def quick_estop_status(gpio_pin: int = 4) -> dict:
     """
-    Quick status check without maintaining a persistent manager instance
+    Quick status check using a manager shared across quick_* calls
     
     Args:
         gpio_pin: GPIO pin number (default: 4)
@@ -69,16 +103,12 @@ def quick_estop_status(gpio_pin: int = 4) -> dict:
     Returns:
         Dictionary with current status
     """
-    manager = EStopManager(gpio_pin=gpio_pin)
-    try:
-        return manager.get_status()
-    finally:
-        manager.cleanup()
+    return _shared_manager(gpio_pin).get_status()
 
 
 def quick_activate_estop(gpio_pin: int = 4) -> bool:
     """
-    Quick e-stop activation without maintaining a persistent manager instance
+    Quick e-stop activation using a manager shared across quick_* calls
     
     Args:
         gpio_pin: GPIO pin number (default: 4)
@@ -86,16 +116,12 @@ def quick_activate_estop(gpio_pin: int = 4) -> bool:
     Returns:
         True if successfully activated
     """
-    manager = EStopManager(gpio_pin=gpio_pin)
-    try:
-        return manager.activate_estop()
-    finally:
-        manager.cleanup()
+    return _shared_manager(gpio_pin).activate_estop()
 
 
 def quick_reset_estop(gpio_pin: int = 4) -> bool:
     """
-    Quick e-stop reset without maintaining a persistent manager instance
+    Quick e-stop reset using a manager shared across quick_* calls
     
     Args:
         gpio_pin: GPIO pin number (default: 4)
@@ -103,11 +129,7 @@ def quick_reset_estop(gpio_pin: int = 4) -> bool:
     Returns:
         True if successfully reset
     """
-    manager = EStopManager(gpio_pin=gpio_pin)
-    try:
-        return manager.reset_estop()
-    finally:
-        manager.cleanup()
+    return _shared_manager(gpio_pin).reset_estop()
 
 
 # Add convenience functions to __all__
@@ -1,290 +1,397 @@
 """
 E-Stop Manager CLI - Command line interface for emergency stop management
 """
-import click
+import argparse
 import logging
 import sys
 import traceback
 import signal
 import atexit
-from datetime import datetime
+import threading
+from collections import deque
+from typing import Optional
 
-# Configure logging early with more visible output
+# ANSI SGR color codes for the styles used by the CLI
+_COLORS = {'red': 31, 'green': 32, 'yellow': 33}
+_USE_COLOR = sys.stdout.isatty()
+
+
+def _style(text: str, fg: Optional[str] = None, bold: bool = False) -> str:
+    """Wrap text in ANSI color/bold codes when writing to a terminal"""
+    if not _USE_COLOR:
+        return text
+    codes = []
+    if fg:
+        codes.append(str(_COLORS[fg]))
+    if bold:
+        codes.append('1')
+    return f"\x1b[{';'.join(codes)}m{text}\x1b[0m"
+
+
+def _echo(message: str = "", err: bool = False):
+    """Print a line to stdout (or stderr with err=True) and flush it"""
+    print(message, file=sys.stderr if err else sys.stdout, flush=True)
+
+
+# Configure logging early; tracing is only emitted with --verbose/--debug
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
+    level=logging.WARNING,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
 logger = logging.getLogger(__name__)
 
 # Log CLI startup
-logger.info("=== E-Stop Manager CLI Starting ===")
+logger.debug("=== E-Stop Manager CLI Starting ===")
 
 # Import with error handling
 try:
-    logger.info("Importing EStopManager components...")
+    logger.debug("Importing EStopManager components...")
     from src.e_stop_manager import EStopManager, EStopMode, EStopState
-    logger.info("✓ Successfully imported EStopManager components")
+    logger.debug("✓ Successfully imported EStopManager components")
 except ImportError as e:
     logger.error(f"✗ Failed to import EStopManager: {e}")
     logger.error(f"Traceback: {traceback.format_exc()}")
-    click.echo(click.style(f"Import Error: {e}", fg='red'), err=True)
+    _echo(_style(f"Import Error: {e}", fg='red'), err=True)
     sys.exit(1)
 except Exception as e:
     logger.error(f"✗ Unexpected error during import: {e}")
     logger.error(f"Traceback: {traceback.format_exc()}")
-    click.echo(click.style(f"Unexpected Import Error: {e}", fg='red'), err=True)
+    _echo(_style(f"Unexpected Import Error: {e}", fg='red'), err=True)
     sys.exit(1)
 
 # Global manager instance
 _manager = None
 
+# Signal that interrupted the running command, if any
+_stop_signal = None
+_SIGNAL_NAMES = {signal.SIGINT: 'SIGINT', signal.SIGTERM: 'SIGTERM'}
+if hasattr(signal, 'SIGHUP'):
+    _SIGNAL_NAMES[signal.SIGHUP] = 'SIGHUP'
+
 
 def _emergency_cleanup():
     """Emergency cleanup function for signals and atexit"""
     global _manager
-    if _manager:
+    # Cleared first so that a second call (signal, then atexit) is a no-op
+    manager, _manager = _manager, None
+    if manager:
         logger.warning("⚠ Emergency cleanup triggered - setting GPIO to safe state")
         try:
-            _manager.cleanup()
+            manager.cleanup()
         except Exception as e:
             logger.error(f"Error during emergency cleanup: {e}")
 
 
 def _signal_handler(signum, frame):
-    """Handle termination signals gracefully"""
-    signal_name = signal.Signals(signum).name
-    logger.warning(f"⚠ Received signal {signal_name} ({signum}) - initiating graceful shutdown")
-    _emergency_cleanup()
-    click.echo(f"\nReceived {signal_name} - E-Stop set to safe state")
-    sys.exit(0)
+    """Handle termination signals by unwinding the running command; cli() cleans up"""
+    global _stop_signal
+    if _stop_signal is None:
+        _stop_signal = signum
+        raise SystemExit(0)
 
 
 # Register signal handlers for graceful shutdown
-logger.info("Registering signal handlers for graceful shutdown...")
+logger.debug("Registering signal handlers for graceful shutdown...")
 signal.signal(signal.SIGINT, _signal_handler)   # Ctrl+C
 signal.signal(signal.SIGTERM, _signal_handler)  # Termination signal
 if hasattr(signal, 'SIGHUP'):
     signal.signal(signal.SIGHUP, _signal_handler)  # Hangup signal (Unix only)
+logger.debug("✓ Signal handlers registered")
+
+
+# Bounds for the monitor's safety-net re-check interval (seconds)
+_MONITOR_POLL_MIN = 0.01
+_MONITOR_POLL_MAX = 2.0
+
 
-# Register cleanup function to run at exit
-atexit.register(_emergency_cleanup)
-logger.info("✓ Signal handlers and cleanup registered")
+def _next_poll_interval(interval: float, change_intervals: deque) -> float:
+    """
+    Back off the monitor re-check interval after an idle wake-up
+    
+    The interval doubles on every idle wake-up, capped at half the mean of
+    the recently observed times between state changes (the exponential
+    fit of the change distribution) so that a typical change is still
+    re-checked at least twice.
+    
+    Args:
+        interval: Interval used for the wake-up that just timed out
+        change_intervals: Recent times between observed state changes
+        
+    Returns:
+        Interval to use for the next wake-up
+    """
+    ceiling = _MONITOR_POLL_MAX
+    if change_intervals:
+        mean_interval = sum(change_intervals) / len(change_intervals)
+        ceiling = max(_MONITOR_POLL_MIN, min(ceiling, mean_interval / 2))
+    return min(interval * 2, ceiling)
 
 
 def get_manager(gpio_pin: int = 4) -> EStopManager:
     """Get or create EStopManager instance"""
     global _manager
-    logger.info(f"get_manager called with gpio_pin={gpio_pin}")
+    logger.debug("get_manager called with gpio_pin=%s", gpio_pin)
     if _manager is None:
-        logger.info("Creating new EStopManager instance...")
+        logger.debug("Creating new EStopManager instance...")
         try:
             _manager = EStopManager(gpio_pin=gpio_pin)
-            logger.info("✓ EStopManager instance created successfully")
+            logger.debug("✓ EStopManager instance created successfully")
+            
+            # Register cleanup only now: gpiozero is imported lazily by the
+            # manager and installs its own atexit hook that closes all
+            # devices, and atexit runs hooks last-in first-out, so ours must
+            # be registered after it to drive the safe state first
+            atexit.register(_emergency_cleanup)
         except Exception as e:
             logger.error(f"✗ Failed to create EStopManager: {e}")
             logger.error(f"Traceback: {traceback.format_exc()}")
             raise
     else:
-        logger.info("Using existing EStopManager instance")
+        logger.debug("Using existing EStopManager instance")
     return _manager
 
 
-@click.group()
-@click.option('--gpio-pin', default=4, help='GPIO pin number (default: 4)')
-@click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
-@click.option('--debug', is_flag=True, help='Enable debug logging')
-@click.pass_context
-def cli(ctx, gpio_pin, verbose, debug):
-    """E-Stop Manager - Emergency stop control via GPIO"""
-    logger.info(f"CLI called with gpio_pin={gpio_pin}, verbose={verbose}, debug={debug}")
-    
-    if debug:
-        logging.getLogger().setLevel(logging.DEBUG)
-        logging.getLogger('app.e_stop_manager').setLevel(logging.DEBUG)
-        logger.debug("Debug logging enabled")
-    elif verbose:
-        logging.getLogger().setLevel(logging.INFO)
-        logging.getLogger('app.e_stop_manager').setLevel(logging.INFO)
-        logger.info("Verbose logging enabled")
-    
-    # Store parameters in context for subcommands
-    ctx.ensure_object(dict)
-    ctx.obj['gpio_pin'] = gpio_pin
-    ctx.obj['verbose'] = verbose
-    ctx.obj['debug'] = debug
-    
-    logger.info(f"Context initialized: {ctx.obj}")
-
-
-@cli.command()
-@click.pass_context
-def estop(ctx):
+def estop(args):
     """Activate the emergency stop"""
-    logger.info("=== ESTOP COMMAND STARTED ===")
+    logger.debug("=== ESTOP COMMAND STARTED ===")
     try:
-        logger.info(f"Getting manager with GPIO pin {ctx.obj['gpio_pin']}")
-        manager = get_manager(ctx.obj['gpio_pin'])
+        logger.debug("Getting manager with GPIO pin %s", args.gpio_pin)
+        manager = get_manager(args.gpio_pin)
         
-        logger.info("Attempting to activate e-stop...")
+        logger.debug("Attempting to activate e-stop...")
         if manager.activate_estop():
-            logger.info("✓ E-stop activation successful")
-            click.echo(click.style("✓ E-stop activated", fg='red', bold=True))
+            logger.debug("✓ E-stop activation successful")
+            _echo(_style("✓ E-stop activated", fg='red', bold=True))
             status = manager.get_status()
-            click.echo(f"Status: {status['estop_state']}")
+            _echo(f"Status: {status['estop_state']}")
         else:
             logger.error("✗ E-stop activation failed")
-            click.echo(click.style("✗ Failed to activate e-stop", fg='red'), err=True)
+            _echo(_style("✗ Failed to activate e-stop", fg='red'), err=True)
             sys.exit(1)
     except Exception as e:
         logger.error(f"✗ Exception in estop command: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        click.echo(click.style(f"Error: {e}", fg='red'), err=True)
+        _echo(_style(f"Error: {e}", fg='red'), err=True)
         sys.exit(1)
     finally:
-        logger.info("=== ESTOP COMMAND FINISHED ===")
+        logger.debug("=== ESTOP COMMAND FINISHED ===")
 
 
-@cli.command()
-@click.pass_context
-def reset(ctx):
+def reset(args):
     """Reset/clear the emergency stop state"""
-    logger.info("=== RESET COMMAND STARTED ===")
+    logger.debug("=== RESET COMMAND STARTED ===")
     try:
-        logger.info(f"Getting manager with GPIO pin {ctx.obj['gpio_pin']}")
-        manager = get_manager(ctx.obj['gpio_pin'])
+        logger.debug("Getting manager with GPIO pin %s", args.gpio_pin)
+        manager = get_manager(args.gpio_pin)
         
-        logger.info("Attempting to reset e-stop...")
+        logger.debug("Attempting to reset e-stop...")
         if manager.reset_estop():
-            logger.info("✓ E-stop reset successful")
-            click.echo(click.style("✓ E-stop reset", fg='green', bold=True))
+            logger.debug("✓ E-stop reset successful")
+            _echo(_style("✓ E-stop reset", fg='green', bold=True))
             status = manager.get_status()
-            click.echo(f"Status: {status['estop_state']}")
+            _echo(f"Status: {status['estop_state']}")
         else:
             logger.error("✗ E-stop reset failed")
-            click.echo(click.style("✗ Failed to reset e-stop", fg='red'), err=True)
+            _echo(_style("✗ Failed to reset e-stop", fg='red'), err=True)
             sys.exit(1)
     except Exception as e:
         logger.error(f"✗ Exception in reset command: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        click.echo(click.style(f"Error: {e}", fg='red'), err=True)
+        _echo(_style(f"Error: {e}", fg='red'), err=True)
         sys.exit(1)
     finally:
-        logger.info("=== RESET COMMAND FINISHED ===")
+        logger.debug("=== RESET COMMAND FINISHED ===")
 
 
-@cli.command()
-@click.pass_context
-def status(ctx):
+def status(args):
     """Show current e-stop status"""
-    logger.info("=== STATUS COMMAND STARTED ===")
+    logger.debug("=== STATUS COMMAND STARTED ===")
     try:
-        logger.info(f"Getting manager with GPIO pin {ctx.obj['gpio_pin']}")
-        manager = get_manager(ctx.obj['gpio_pin'])
+        logger.debug("Getting manager with GPIO pin %s", args.gpio_pin)
+        manager = get_manager(args.gpio_pin)
         
-        logger.info("Getting status information...")
+        logger.debug("Getting status information...")
         status = manager.get_status()
-        logger.info(f"Status retrieved: {status}")
+        logger.debug("Status retrieved: %s", status)
         
         # Format status display
-        state_color = 'red' if status['estop_state'] == 'active' else 'green'
+        state_color = 'red' if status['is_active'] else 'green'
         
-        click.echo("E-Stop Manager Status (Software E-Stop)")
-        click.echo("=" * 40)
-        click.echo(f"E-Stop State: {click.style(status['estop_state'].upper(), fg=state_color, bold=True)}")
-        click.echo(f"GPIO Pin: {status['gpio_pin']} (OUTPUT)")
-        click.echo(f"GPIO Output: {click.style('HIGH' if status['gpio_active'] else 'LOW', fg='green' if status['gpio_active'] else 'red', bold=True)}")
-        click.echo(f"Mode: {status['mode'].upper()} ({'Normally Closed' if status['mode'] == 'nc' else 'Normally Open'})")
-        click.echo(f"Manual Override: {status['manual_override']}")
-        click.echo(f"GPIO Available: {status['gpio_available']}")
-        click.echo()
-        click.echo("Output Logic")
-        click.echo("-" * 12)
-        if status['mode'] == 'nc':
-            click.echo("• NC Mode: HIGH when inactive, LOW when e-stop active")
+        _echo("E-Stop Manager Status (Software E-Stop)")
+        _echo("=" * 40)
+        _echo(f"E-Stop State: {_style(status['estop_state'].upper(), fg=state_color, bold=True)}")
+        _echo(f"GPIO Pin: {status['gpio_pin']} (OUTPUT)")
+        _echo(f"GPIO Output: {_style('HIGH' if status['gpio_active'] else 'LOW', fg='green' if status['gpio_active'] else 'red', bold=True)}")
+        _echo(f"Mode: {status['mode'].upper()} ({'Normally Closed' if status['is_nc'] else 'Normally Open'})")
+        _echo(f"Manual Override: {status['manual_override']}")
+        _echo(f"GPIO Available: {status['gpio_available']}")
+        _echo()
+        _echo("Output Logic")
+        _echo("-" * 12)
+        if status['is_nc']:
+            _echo("• NC Mode: HIGH when inactive, LOW when e-stop active")
         else:
-            click.echo("• NO Mode: LOW when inactive, HIGH when e-stop active")
-        click.echo()
-        click.echo("System Information")
-        click.echo("-" * 18)
-        click.echo(f"Platform: {status['pi_model']}")
-        click.echo(f"GPIO Backend: {status['gpio_backend']}")
+            _echo("• NO Mode: LOW when inactive, HIGH when e-stop active")
+        _echo()
+        _echo("System Information")
+        _echo("-" * 18)
+        _echo(f"Platform: {status['pi_model']}")
+        _echo(f"GPIO Backend: {status['gpio_backend']}")
         
         if status.get('pi5_optimized'):
-            click.echo(click.style("✓ Pi 5 Optimized (lgpio backend active)", fg='green'))
+            _echo(_style("✓ Pi 5 Optimized (lgpio backend active)", fg='green'))
         elif 'Raspberry Pi 5' in status['pi_model']:
-            click.echo(click.style("⚠ Pi 5 detected but not optimized (install lgpio)", fg='yellow'))
+            _echo(_style("⚠ Pi 5 detected but not optimized (install lgpio)", fg='yellow'))
         
         if not status['gpio_available']:
-            click.echo(click.style("⚠ Warning: GPIO not available (simulation mode)", fg='yellow'))
+            _echo(_style("⚠ Warning: GPIO not available (simulation mode)", fg='yellow'))
             
-        logger.info("✓ Status display completed successfully")
+        logger.debug("✓ Status display completed successfully")
     except Exception as e:
         logger.error(f"✗ Exception in status command: {e}")
         logger.error(f"Traceback: {traceback.format_exc()}")
-        click.echo(click.style(f"Error: {e}", fg='red'), err=True)
+        _echo(_style(f"Error: {e}", fg='red'), err=True)
         sys.exit(1)
     finally:
-        logger.info("=== STATUS COMMAND FINISHED ===")
+        logger.debug("=== STATUS COMMAND FINISHED ===")
 
 
-@cli.command()
-@click.option('--mode', type=click.Choice(['nc', 'no'], case_sensitive=False), 
-              help='Set e-stop mode: nc (normally closed) or no (normally open)')
-@click.pass_context
-def config(ctx, mode):
+def config(args):
     """Configure e-stop settings"""
-    manager = get_manager(ctx.obj['gpio_pin'])
+    mode = args.mode
+    debounce_ms = args.debounce_ms
+    manager = get_manager(args.gpio_pin)
     
     if mode:
         estop_mode = EStopMode.NC if mode.lower() == 'nc' else EStopMode.NO
         if manager.set_mode(estop_mode):
-            click.echo(click.style(f"✓ Mode set to {mode.upper()}", fg='green'))
+            _echo(_style(f"✓ Mode set to {mode.upper()}", fg='green'))
             mode_desc = "Normally Closed (safer)" if mode.lower() == 'nc' else "Normally Open"
-            click.echo(f"Description: {mode_desc}")
+            _echo(f"Description: {mode_desc}")
         else:
-            click.echo(click.style("✗ Failed to set mode", fg='red'), err=True)
+            _echo(_style("✗ Failed to set mode", fg='red'), err=True)
             sys.exit(1)
-    else:
+    if debounce_ms is not None:
+        if manager.set_debounce(debounce_ms):
+            _echo(_style(f"✓ Debounce set to {debounce_ms} ms", fg='green'))
+        else:
+            _echo(_style("✗ Failed to set debounce", fg='red'), err=True)
+            sys.exit(1)
+    if not mode and debounce_ms is None:
         # Show current configuration
         status = manager.get_status()
-        click.echo("Current Configuration")
-        click.echo("=" * 20)
-        click.echo(f"Mode: {status['mode'].upper()}")
-        click.echo(f"GPIO Pin: {status['gpio_pin']}")
-        click.echo(f"Manual Override: {status['manual_override']}")
+        _echo("Current Configuration")
+        _echo("=" * 20)
+        _echo(f"Mode: {status['mode'].upper()}")
+        _echo(f"GPIO Pin: {status['gpio_pin']}")
+        _echo(f"Manual Override: {status['manual_override']}")
+        _echo(f"Debounce: {status['debounce_ms']} ms")
 
 
-@cli.command()
-@click.pass_context
-def monitor(ctx):
+def monitor(args):
     """Monitor e-stop state in real-time (Ctrl+C to stop)"""
-    manager = get_manager(ctx.obj['gpio_pin'])
+    import time
+    from datetime import datetime
+    
+    manager = get_manager(args.gpio_pin)
+    
+    _echo("Monitoring e-stop state (Press Ctrl+C to stop)")
+    _echo("=" * 45)
+    
+    # Hoist attribute lookups out of the callback and loop
+    get_state = manager.get_estop_state
+    now_wall = datetime.now
+    monotonic = time.monotonic
+    echo = _echo
+    style = _style
+    
+    def print_state(state: EStopState):
+        timestamp = now_wall().strftime("%H:%M:%S")
+        state_color = 'red' if state is EStopState.ACTIVE else 'green'
+        echo(f"[{timestamp}] State: {style(state.upper(), fg=state_color, bold=True)}")
+    
+    changed = threading.Event()
+    wait_changed = changed.wait
+    clear_changed = changed.clear
+    
+    def on_change(state: EStopState):
+        print_state(state)
+        changed.set()
+    
+    print_state(get_state())
+    manager.when_changed = on_change
+    
+    # Re-read the state on an adaptive interval that backs off while idle;
+    # the signal handler ends the loop and cli() runs cleanup()
+    poll_interval = _MONITOR_POLL_MIN
+    change_intervals = deque(maxlen=16)
+    last_change = None
+    while True:
+        if wait_changed(poll_interval):
+            clear_changed()
+            now = monotonic()
+            if last_change is not None:
+                change_intervals.append(now - last_change)
+            last_change = now
+            poll_interval = _MONITOR_POLL_MIN
+        else:
+            poll_interval = _next_poll_interval(poll_interval, change_intervals)
+        get_state()
+
+
+def _non_negative_int(value: str) -> int:
+    """argparse type for integers >= 0"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} is not in the range x>=0")
+    return number
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser with one subcommand per command function"""
+    parser = argparse.ArgumentParser(
+        prog='python -m app',
+        description="E-Stop Manager - Emergency stop control via GPIO"
+    )
+    parser.add_argument('--gpio-pin', type=int, default=4, help='GPIO pin number (default: 4)')
+    parser.add_argument('--verbose', '-v', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--debug', action='store_true', help='Enable debug logging')
     
-    click.echo("Monitoring e-stop state (Press Ctrl+C to stop)")
-    click.echo("=" * 45)
+    commands = parser.add_subparsers(dest='command', metavar='COMMAND', required=True)
+    for func in (estop, reset, status, config, monitor):
+        command = commands.add_parser(func.__name__, help=func.__doc__, description=func.__doc__)
+        command.set_defaults(func=func)
+        if func is config:
+            command.add_argument('--mode', type=str.lower, choices=['nc', 'no'],
+                                 help='Set e-stop mode: nc (normally closed) or no (normally open)')
+            command.add_argument('--debounce-ms', type=_non_negative_int,
+                                 help='Set GPIO debounce window in milliseconds (0 disables)')
+    return parser
+
+
+def cli(argv: Optional[list] = None):
+    """E-Stop Manager - Emergency stop control via GPIO"""
+    args = _build_parser().parse_args(argv)
+    logger.debug("CLI called with gpio_pin=%s, verbose=%s, debug=%s", args.gpio_pin, args.verbose, args.debug)
+    
+    if args.debug:
+        logging.getLogger().setLevel(logging.DEBUG)
+        logging.getLogger('app.e_stop_manager').setLevel(logging.DEBUG)
+        logger.debug("Debug logging enabled")
+    elif args.verbose:
+        logging.getLogger().setLevel(logging.INFO)
+        logging.getLogger('app.e_stop_manager').setLevel(logging.INFO)
+        logger.info("Verbose logging enabled")
     
-    last_state = None
     try:
-        while True:
-            current_state = manager.get_estop_state()
-            if current_state != last_state:
-                timestamp = datetime.now().strftime("%H:%M:%S")
-                state_color = 'red' if current_state == EStopState.ACTIVE else 'green'
-                click.echo(f"[{timestamp}] State: {click.style(current_state.value.upper(), fg=state_color, bold=True)}")
-                last_state = current_state
-            
-            # Small delay to avoid excessive CPU usage
-            import time
-            time.sleep(0.1)
-            
-    except KeyboardInterrupt:
-        click.echo("\nMonitoring stopped")
+        args.func(args)
     finally:
-        manager.cleanup()
+        if _stop_signal is not None:
+            signal_name = _SIGNAL_NAMES.get(_stop_signal, _stop_signal)
+            logger.warning(f"⚠ Received signal {signal_name} ({_stop_signal}) - initiating graceful shutdown")
+            _emergency_cleanup()
+            _echo(f"\nReceived {signal_name} - E-Stop set to safe state")
 
 
 if __name__ == '__main__':
@@ -293,10 +400,10 @@ if __name__ == '__main__':
     except KeyboardInterrupt:
         if _manager:
             _manager.cleanup()
-        click.echo("\nOperation cancelled")
+        _echo("\nOperation cancelled")
         sys.exit(1)
     except Exception as e:
         if _manager:
             _manager.cleanup()
-        click.echo(click.style(f"Error: {e}", fg='red'), err=True)
+        _echo(_style(f"Error: {e}", fg='red'), err=True)
         sys.exit(1)
@@ -12,21 +12,65 @@ Usage:
 Press Ctrl+C to stop gracefully.
 """
 
+import os
+import select
 import time
 import signal
 import sys
 import argparse
-from datetime import datetime
-from app.e_stop_manager import EStopManager, EStopMode, EStopState
+from app import EStopManager, EStopMode, EStopState
 
 # Global manager for cleanup
 manager = None
 
+# Set by signal_handler; the main loop stops and cleans up outside signal context
+_stop_signal = None
+_SIGNAL_NAMES = {signal.SIGINT: 'SIGINT', signal.SIGTERM: 'SIGTERM'}
+
+# Wall-clock anchor for display timestamps; elapsed time is measured on the
+# monotonic clock so NTP adjustments cannot make the printed times jump
+_T0_WALL_NS = time.time_ns()
+_T0_MONOTONIC_NS = time.monotonic_ns()
+
+# Color codes for terminal output
+RED = '\033[91m'
+GREEN = '\033[92m'
+YELLOW = '\033[93m'
+BLUE = '\033[94m'
+BOLD = '\033[1m'
+RESET = '\033[0m'
+
+
+def _status_format(is_active: bool, gpio_active: bool) -> str:
+    """Build the status line template for one e-stop state / GPIO level pair"""
+    state_color = RED if is_active else GREEN
+    state = "ACTIVE" if is_active else "INACTIVE"
+    gpio_color = GREEN if gpio_active else RED  # LOW=red, HIGH=green
+    gpio_level = "HIGH" if gpio_active else "LOW"
+    return (f"[{BLUE}{{time}}{RESET}] "
+            f"Cycle: {BOLD}{{cycle:3d}}{RESET} | "
+            f"State: {state_color}{BOLD}{state:8s}{RESET} | "
+            f"GPIO: {gpio_color}{BOLD}{gpio_level:4s}{RESET} | "
+            f"Mode: {YELLOW}{{mode}}{RESET}")
+
+
+# Status line templates keyed by (is_active, gpio_active), built once
+_STATUS_FORMATS = {
+    (is_active, gpio_active): _status_format(is_active, gpio_active)
+    for is_active in (False, True)
+    for gpio_active in (False, True)
+}
+
 
 def signal_handler(signum, frame):
-    """Handle termination signals gracefully"""
-    global manager
-    signal_name = signal.Signals(signum).name
+    """Handle termination signals by asking the main loop to stop"""
+    global _stop_signal
+    _stop_signal = signum
+
+
+def stop_demo():
+    """Set the e-stop to its safe state and release GPIO after a stop request"""
+    signal_name = _SIGNAL_NAMES.get(_stop_signal, _stop_signal)
     print(f"\n⚠️ Received {signal_name} - stopping toggle demo...")
     
     if manager:
@@ -38,38 +82,18 @@ def signal_handler(signum, frame):
             print(f"❌ Error during cleanup: {e}")
     
     print("👋 Demo stopped")
-    sys.exit(0)
 
 
 def display_status(manager: EStopManager, cycle_count: int):
     """Display current status with formatting"""
     status = manager.get_status()
-    current_time = datetime.now().strftime("%H:%M:%S.%f")[:-3]  # Include milliseconds
-    
-    # Color codes for terminal output
-    RED = '\033[91m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    BLUE = '\033[94m'
-    BOLD = '\033[1m'
-    RESET = '\033[0m'
-    
-    # State colors
-    if status['estop_state'] == 'active':
-        state_color = RED
-        gpio_color = RED if not status['gpio_active'] else GREEN  # LOW=red, HIGH=green
-    else:
-        state_color = GREEN
-        gpio_color = GREEN if status['gpio_active'] else RED
+    now_ns = _T0_WALL_NS + (time.monotonic_ns() - _T0_MONOTONIC_NS)
+    seconds, ns = divmod(now_ns, 1_000_000_000)
+    current_time = f"{time.strftime('%H:%M:%S', time.localtime(seconds))}.{ns // 1_000_000:03d}"
     
-    # GPIO output display
-    gpio_level = "HIGH" if status['gpio_active'] else "LOW"
-    
-    print(f"[{BLUE}{current_time}{RESET}] "
-          f"Cycle: {BOLD}{cycle_count:3d}{RESET} | "
-          f"State: {state_color}{BOLD}{status['estop_state'].upper():8s}{RESET} | "
-          f"GPIO: {gpio_color}{BOLD}{gpio_level:4s}{RESET} | "
-          f"Mode: {YELLOW}{status['mode'].upper()}{RESET}")
+    status_format = _STATUS_FORMATS[status['is_active'], status['gpio_active']]
+    print(status_format.format(time=current_time, cycle=cycle_count,
+                               mode=status['mode'].upper()))
 
 
 def main():
@@ -93,6 +117,13 @@ def main():
     signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
     signal.signal(signal.SIGTERM, signal_handler)  # Termination
     
+    # The interpreter writes each caught signal to this pipe without taking
+    # any lock, which wakes the main loop out of its wait between cycles
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    
     try:
         # Initialize E-Stop Manager
         print("🚀 Starting E-Stop Toggle Demo")
@@ -116,7 +147,6 @@ def main():
         # Reset to known state
         print("🔄 Resetting to inactive state...")
         manager.reset_estop()
-        time.sleep(0.1)  # Brief pause for state to settle
         
         # Main toggle loop
         cycle_count = 0
@@ -125,7 +155,12 @@ def main():
         print("🎯 Starting toggle sequence:")
         print()
         
-        while True:
+        # Toggle on a fixed monotonic schedule so the time spent toggling and
+        # printing does not accumulate as drift
+        interval_ns = round(args.interval * 1_000_000_000)
+        next_cycle = time.monotonic_ns()
+        
+        while _stop_signal is None:
             cycle_count += 1
             
             if is_active:
@@ -145,7 +180,18 @@ def main():
             display_status(manager, cycle_count)
             
             # Wait for next cycle
-            time.sleep(args.interval)
+            next_cycle += interval_ns
+            delay_ns = next_cycle - time.monotonic_ns()
+            if interval_ns > 0 and -delay_ns >= interval_ns:
+                # Whole cycles missed: skip them instead of bursting through
+                # the backlog; a cycle less than one interval late just runs now
+                missed = (-delay_ns) // interval_ns
+                print(f"⚠️ Missed {missed} cycle(s)")
+                next_cycle += missed * interval_ns
+                delay_ns += missed * interval_ns
+            if delay_ns > 0:
+                # Wakes early when a signal requests a stop
+                select.select([wake_r], [], [], delay_ns / 1_000_000_000)
             
     except KeyboardInterrupt:
         # This should be handled by signal_handler, but just in case
@@ -162,6 +208,8 @@ def main():
             except Exception as cleanup_error:
                 print(f"❌ Emergency cleanup failed: {cleanup_error}")
         sys.exit(1)
+    
+    stop_demo()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 """
 E-Stop Manager - Core functionality for managing emergency stop via GPIO
 """
+import functools
 import json
 import os
 from pathlib import Path
@@ -8,67 +9,199 @@ from typing import Optional
 from enum import Enum
 import logging
 import platform
+import re
+import struct
+import time
 import traceback
 
 logger = logging.getLogger(__name__)
 
-# Log module initialization
-logger.info("=== EStopManager Module Initializing ===")
-
-# Import GPIO libraries with detailed logging
-try:
-    logger.info("Importing gpiozero...")
-    from gpiozero import DigitalInputDevice, DigitalOutputDevice, Device
-    logger.info("✓ gpiozero imported successfully")
-except ImportError as e:
-    logger.error(f"✗ Failed to import gpiozero: {e}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    raise ImportError(f"gpiozero import failed: {e}") from e
-except Exception as e:
-    logger.error(f"✗ Unexpected error importing gpiozero: {e}")
-    logger.error(f"Traceback: {traceback.format_exc()}")
-    raise
-
-# Pi 5 optimization: Prefer lgpio backend for better performance
-logger.info("Attempting Pi 5 optimization with lgpio backend...")
-try:
-    logger.info("Importing LGPIOFactory...")
-    from gpiozero.pins.lgpio import LGPIOFactory
-    logger.info("✓ LGPIOFactory imported successfully")
-    
-    logger.info("Setting LGPIOFactory as pin factory...")
-    Device.pin_factory = LGPIOFactory()
-    _PI5_OPTIMIZED = True
-    logger.info("✓ Pi 5 optimization successful - lgpio backend active")
-except ImportError as e:
-    logger.warning(f"⚠ lgpio not available: {e}")
-    logger.info("Falling back to default pin factory")
-    _PI5_OPTIMIZED = False
-except Exception as e:
-    logger.warning(f"⚠ Unexpected error setting up lgpio: {e}")
-    logger.info("Falling back to default pin factory")
-    _PI5_OPTIMIZED = False
-
-logger.info(f"GPIO backend initialization complete. Pi5 optimized: {_PI5_OPTIMIZED}")
-
-
-class EStopMode(Enum):
-    """E-Stop wiring configuration modes"""
+_IS_DARWIN = platform.system() == "Darwin"
+
+# Debounce window used when neither the caller nor the config file sets one
+_DEFAULT_DEBOUNCE_MS = 20
+
+# Longest cleanup() spins waiting for the safe level to read back on the pin
+_SETTLE_TIMEOUT_NS = 1_000_000
+
+# GPIO libraries are imported on first use so that importing this module
+# (CLI --help, simulation on non-Pi hosts) does not pay for lgpio/gpiozero
+DigitalOutputDevice = None
+Device = None
+lgpio = None
+_gpio_imported = False
+
+
+def _import_gpio():
+    """Import lgpio when it is installed (once per process)"""
+    global lgpio, _gpio_imported
+    if _gpio_imported:
+        return
+    
+    # Pi 5 optimization: Drive the pin through lgpio directly
+    logger.info("Attempting Pi 5 optimization with lgpio backend...")
+    try:
+        logger.info("Importing lgpio...")
+        import lgpio
+        logger.info("✓ lgpio imported successfully")
+    except ImportError as e:
+        logger.warning(f"⚠ lgpio not available: {e}")
+        logger.info("Falling back to gpiozero")
+    except Exception as e:
+        logger.warning(f"⚠ Unexpected error importing lgpio: {e}")
+        logger.info("Falling back to gpiozero")
+        lgpio = None
+    
+    _gpio_imported = True
+
+
+def _import_gpiozero():
+    """Import gpiozero for the fallback output path (once per process)"""
+    global DigitalOutputDevice, Device
+    if Device is not None:
+        return
+    
+    # Import GPIO libraries with detailed logging
+    try:
+        logger.info("Importing gpiozero...")
+        from gpiozero import DigitalOutputDevice, Device
+        logger.info("✓ gpiozero imported successfully")
+    except ImportError as e:
+        logger.error(f"✗ Failed to import gpiozero: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise ImportError(f"gpiozero import failed: {e}") from e
+    except Exception as e:
+        logger.error(f"✗ Unexpected error importing gpiozero: {e}")
+        logger.error(f"Traceback: {traceback.format_exc()}")
+        raise
+
+
+# Broadcom SoCs identifying specific Pi models, in detection priority order
+_PI_MODELS = (
+    ('BCM2712', "Raspberry Pi 5"),
+    ('BCM2711', "Raspberry Pi 4"),
+)
+_BCM_SOC_RE = re.compile(r'BCM\d*')
+
+
+@functools.lru_cache(maxsize=1)
+def _detect_pi_model() -> str:
+    """Detect the board model from /proc/cpuinfo (invariant for the process lifetime)"""
+    pi_model = "Unknown"
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            # Collect every Broadcom SoC id in a single scan of the file
+            socs = set(_BCM_SOC_RE.findall(f.read()))
+        if socs:
+            pi_model = next((model for soc, model in _PI_MODELS if soc in socs),
+                            "Raspberry Pi (older model)")
+    except:
+        if _IS_DARWIN:
+            pi_model = "macOS (simulation)"
+        else:
+            pi_model = "Non-Pi system"
+    return pi_model
+
+
+_CPUINFO_REVISION_RE = re.compile(r'^Revision\s*:\s*([0-9a-fA-F]+)', re.MULTILINE)
+
+
+@functools.lru_cache(maxsize=1)
+def _board_revision() -> Optional[int]:
+    """Raspberry Pi revision code, read the same way as gpiozero (None off-Pi)"""
+    try:
+        try:
+            with open('/proc/device-tree/system/linux,revision', 'rb') as f:
+                revision = format(struct.unpack('>L', f.read(4))[0], 'x')
+        except FileNotFoundError:
+            with open('/proc/cpuinfo', 'r') as f:
+                match = _CPUINFO_REVISION_RE.search(f.read())
+            if match is None:
+                return None
+            revision = match.group(1).lower()
+    except (OSError, struct.error):
+        return None
+    
+    # Over-volted boards prefix the code with 100
+    if revision.startswith('100'):
+        revision = revision[-4:]
+    return int(revision, 16)
+
+
+def _gpiochip_number() -> int:
+    """gpiochip carrying the 40-pin header (same rule as gpiozero's LGPIOFactory)"""
+    # Board type 0x17 is the Pi 5, whose header (RP1) is gpiochip4 on kernels
+    # before 6.6.45 and gpiochip0 after
+    revision = _board_revision()
+    if revision is not None and (revision & 0xff0) >> 4 == 0x17 and os.path.exists('/dev/gpiochip4'):
+        return 4
+    return 0
+
+
+class EStopMode(str, Enum):
+    """E-Stop wiring configuration modes (members are their own string values)"""
+    __str__ = str.__str__
+    
     NC = "nc"  # Normally Closed (safer, default)
     NO = "no"  # Normally Open
 
 
-class EStopState(Enum):
-    """E-Stop states"""
+class EStopState(str, Enum):
+    """E-Stop states (members are their own string values)"""
+    __str__ = str.__str__
+    
     ACTIVE = "active"      # E-stop is engaged
     INACTIVE = "inactive"  # E-stop is not engaged
 
 
+# E-stop state indexed by "e-stop active", i.e. GPIO level XOR the NC mode bit:
+# NC is active when the GPIO goes low (circuit broken), NO when it goes high
+_STATE_TABLE = (EStopState.INACTIVE, EStopState.ACTIVE)
+
+def _parse_debounce_ms(value: str) -> int:
+    """Parse a saved debounce window, rejecting negatives like set_debounce()"""
+    debounce_ms = int(value)
+    if debounce_ms < 0:
+        raise ValueError(f"debounce_ms must be >= 0, got {debounce_ms}")
+    return debounce_ms
+
+
+# Config file keys and the parsers for their key=value text
+_CONFIG_FIELDS = {
+    'mode': EStopMode,
+    'manual_override': lambda value: value == '1',
+    'gpio_pin': int,
+    'debounce_ms': _parse_debounce_ms,
+}
+
+
+def _parse_config(data: bytes) -> dict:
+    """Parse the key=value lines of a config file, ignoring unknown keys"""
+    config = {}
+    for line in data.decode().splitlines():
+        key, sep, value = line.partition('=')
+        key = key.strip()
+        if sep and key in _CONFIG_FIELDS:
+            config[key] = _CONFIG_FIELDS[key](value.strip())
+    return config
+
+
 class EStopManager:
     """Manages emergency stop functionality using GPIO"""
     
+    # Fixed attribute set: cheaper attribute access on the hot paths, and a
+    # mistyped attribute name raises instead of silently creating a new one
+    __slots__ = (
+        'gpio_pin', 'mode', 'debounce_ms', 'config_file', 'when_changed',
+        '_legacy_config_file', '_chip', '_gpio_device', '_read_level', '_write_level',
+        '_last_level', '_gpio_backend', '_current_state', '_manual_override',
+        '_last_transition', '_last_saved', '_config_dirty', '_cfg_dir_fd', '_cfg_name',
+        '_nc_bit', '_out_for_active', '_out_for_inactive',
+        '_debounce_s', '_status_template',
+    )
+    
     def __init__(self, gpio_pin: int = 4, mode: EStopMode = EStopMode.NC, 
-                 config_file: Optional[str] = None):
+                 config_file: Optional[str] = None, debounce_ms: Optional[int] = None):
         """
         Initialize E-Stop Manager
         
@@ -76,42 +209,75 @@ class EStopManager:
             gpio_pin: GPIO pin number for e-stop (default: 4)
             mode: E-stop mode (NC or NO, default: NC for safety)
             config_file: Optional config file path for persistence
+            debounce_ms: Ignore GPIO transitions within this many milliseconds
+                of the last accepted one. Only read-backs that disagree with the
+                level this manager last drove are debounced. None uses the saved
+                config, else 20
         """
         logger.info(f"=== EStopManager.__init__ called ===")
-        logger.info(f"Parameters: gpio_pin={gpio_pin}, mode={mode}, config_file={config_file}")
+        logger.info(f"Parameters: gpio_pin={gpio_pin}, mode={mode}, config_file={config_file}, debounce_ms={debounce_ms}")
         
         self.gpio_pin = gpio_pin
         self.mode = mode
-        self.config_file = config_file or str(Path.home() / ".estop_config.json")
+        self.debounce_ms = debounce_ms
+        self.config_file = config_file or str(Path.home() / ".estop_config")
+        # JSON config written by earlier versions, read if the default file is missing
+        self._legacy_config_file = None if config_file else str(Path.home() / ".estop_config.json")
         logger.info(f"Config file path: {self.config_file}")
         
         # Initialize GPIO
-        self._gpio_device = None
+        self._chip = None  # lgpio gpiochip handle, when driving the pin directly
+        self._gpio_device = None  # gpiozero fallback when lgpio is unavailable
+        self._read_level = None  # Reads the pin level; None in simulation mode
+        self._write_level = None  # Writes the pin level; None in simulation mode
+        self._last_level = None  # Level last written to the pin; None forces the next write
+        self._gpio_backend = "None"
         self._current_state = EStopState.INACTIVE
         self._manual_override = False
+        self._last_transition = 0.0  # time.monotonic() of the last accepted GPIO transition
+        self._last_saved = None  # (mode, manual_override, gpio_pin, debounce_ms) last on disk
+        self._config_dirty = False  # A reset is waiting to be persisted
+        self._cfg_dir_fd = None  # Config directory, opened on first save
+        self._cfg_name = None
+        
+        # Optional callback invoked with the new EStopState on every transition
+        self.when_changed = None
         logger.info("Initial state variables set")
         
         # Load saved configuration
         logger.info("Loading saved configuration...")
         self._load_config()
+        if self.debounce_ms is None:
+            self.debounce_ms = _DEFAULT_DEBOUNCE_MS
+        self._apply_mode()
+        self._debounce_s = self.debounce_ms / 1000.0
         
         # Initialize GPIO device
         logger.info("Initializing GPIO device...")
         self._init_gpio()
         
         logger.info(f"✓ EStopManager initialization complete")
-        logger.info(f"Final state: gpio_pin={self.gpio_pin}, mode={self.mode.value}, gpio_device={'Available' if self._gpio_device else 'None'}")
+        logger.info(f"Final state: gpio_pin={self.gpio_pin}, mode={self.mode}, gpio_device={'Available' if self._write_level else 'None'}")
     
     def _init_gpio(self):
-        """Initialize GPIO device as output for software e-stop control"""
+        """Initialize GPIO pin as output for software e-stop control"""
+        _import_gpio()
         logger.info(f"Attempting to initialize GPIO pin {self.gpio_pin} as OUTPUT")
-        logger.info(f"Current pin factory: {type(Device.pin_factory).__name__ if Device.pin_factory else 'None'}")
+        self._last_level = None
         
         try:
-            logger.info("Creating DigitalOutputDevice...")
-            self._gpio_device = DigitalOutputDevice(self.gpio_pin)
-            logger.info(f"✓ GPIO pin {self.gpio_pin} initialized successfully as output")
-            logger.info(f"GPIO device type: {type(self._gpio_device)}")
+            if lgpio is not None:
+                try:
+                    self._init_lgpio()
+                except Exception as e:
+                    # e.g. no accessible /dev/gpiochip*: let gpiozero pick a factory
+                    logger.warning(f"⚠ lgpio could not claim GPIO pin {self.gpio_pin}: {e}")
+                    logger.info("Falling back to gpiozero")
+                    _import_gpiozero()
+                    self._init_gpiozero()
+            else:
+                _import_gpiozero()
+                self._init_gpiozero()
             
             # Set initial state based on current e-stop state
             self._update_gpio_output()
@@ -121,67 +287,199 @@ class EStopManager:
             logger.error(f"✗ Failed to initialize GPIO pin {self.gpio_pin}: {e}")
             logger.error(f"Exception type: {type(e).__name__}")
             logger.error(f"Traceback: {traceback.format_exc()}")
-            logger.warning("Setting GPIO device to None (simulation mode)")
+            logger.warning("Releasing GPIO (simulation mode)")
             # For testing without actual GPIO hardware
-            self._gpio_device = None
+            try:
+                self._release_gpio()
+            except Exception as release_error:
+                logger.debug(f"Error releasing GPIO: {release_error}")
+            self._gpio_backend = "None"
+        
+        self._refresh_status_template()
+    
+    def _init_lgpio(self):
+        """Claim the pin as an output directly on the gpiochip"""
+        chip = _gpiochip_number()
+        logger.info(f"Opening gpiochip{chip} via lgpio...")
+        handle = lgpio.gpiochip_open(chip)
+        try:
+            # Claim at the safe level (e-stop active) until the real state is applied
+            lgpio.gpio_claim_output(handle, self.gpio_pin, self._out_for_active)
+        except Exception:
+            lgpio.gpiochip_close(handle)
+            raise
+        self._chip = handle
+        logger.info(f"✓ GPIO pin {self.gpio_pin} initialized successfully as output")
+        logger.info("✓ Pi 5 optimization successful - lgpio backend active")
+        
+        self._read_level = functools.partial(lgpio.gpio_read, self._chip, self.gpio_pin)
+        self._write_level = functools.partial(lgpio.gpio_write, self._chip, self.gpio_pin)
+        self._gpio_backend = "lgpio"
+    
+    def _init_gpiozero(self):
+        """Create a gpiozero output device for the pin (non-lgpio fallback)"""
+        logger.info(f"Current pin factory: {type(Device.pin_factory).__name__ if Device.pin_factory else 'None'}")
+        logger.info("Creating DigitalOutputDevice...")
+        self._gpio_device = DigitalOutputDevice(self.gpio_pin)
+        logger.info(f"✓ GPIO pin {self.gpio_pin} initialized successfully as output")
+        logger.info(f"GPIO device type: {type(self._gpio_device)}")
+        
+        self._read_level = self._gpiozero_read
+        self._write_level = self._gpiozero_write
+        # gpiozero picks its pin factory lazily on first device creation, so
+        # the backend name is only settled once the device has been created
+        self._gpio_backend = type(Device.pin_factory).__name__ if Device.pin_factory else "None"
+    
+    def _gpiozero_read(self) -> bool:
+        """Read the output level through the gpiozero device"""
+        return self._gpio_device.is_active
+    
+    def _gpiozero_write(self, level: bool):
+        """Set the output level through the gpiozero device"""
+        (self._gpio_device.on if level else self._gpio_device.off)()
+    
+    def _release_gpio(self):
+        """Free the pin and close the gpiochip or gpiozero device"""
+        self._read_level = None
+        self._write_level = None
+        self._last_level = None
+        if self._chip is not None:
+            chip, self._chip = self._chip, None
+            try:
+                lgpio.gpio_free(chip, self.gpio_pin)
+            finally:
+                lgpio.gpiochip_close(chip)
+        if self._gpio_device is not None:
+            device, self._gpio_device = self._gpio_device, None
+            device.close()
+    
+    def _apply_mode(self):
+        """Precompute the mode-dependent GPIO polarity used on the hot paths"""
+        self._nc_bit = 1 if self.mode is EStopMode.NC else 0
+        # Output level for an engaged / released e-stop: NC drives LOW when
+        # engaged (HIGH when released), NO the opposite
+        self._out_for_active = self.mode is EStopMode.NO
+        self._out_for_inactive = not self._out_for_active
+    
+    def _refresh_status_template(self):
+        """Rebuild the get_status() fields that only change with configuration"""
+        self._status_template = {
+            'estop_state': None,
+            'is_active': None,
+            'gpio_pin': self.gpio_pin,
+            'gpio_active': None,
+            'mode': self.mode,
+            'is_nc': self.mode is EStopMode.NC,
+            'manual_override': None,
+            'debounce_ms': self.debounce_ms,
+            'gpio_available': self._write_level is not None,
+            'pi_model': _detect_pi_model(),
+            'pi5_optimized': self._gpio_backend == "lgpio",
+            'gpio_backend': self._gpio_backend
+        }
     
     def _load_config(self):
         """Load configuration from file"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r') as f:
-                    config = json.load(f)
-                    self.mode = EStopMode(config.get('mode', EStopMode.NC.value))
-                    self._manual_override = config.get('manual_override', False)
-                    logger.info(f"Loaded config: mode={self.mode.value}, manual_override={self._manual_override}")
+            try:
+                with open(self.config_file, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                if self._legacy_config_file is None:
+                    raise
+                with open(self._legacy_config_file, 'rb') as f:
+                    data = f.read()
+            
+            # Earlier versions saved JSON; it is rewritten as key=value on the next save
+            legacy = data.lstrip().startswith(b'{')
+            config = json.loads(data) if legacy else _parse_config(data)
+            self.mode = EStopMode(config.get('mode', EStopMode.NC))
+            self._manual_override = config.get('manual_override', False)
+            # An explicit constructor argument wins over the saved value
+            if self.debounce_ms is None:
+                self.debounce_ms = config.get('debounce_ms')
+            if not legacy:
+                self._last_saved = (config.get('mode'), config.get('manual_override'),
+                                    config.get('gpio_pin'), config.get('debounce_ms'))
+            logger.info(f"Loaded config: mode={self.mode}, manual_override={self._manual_override}, debounce_ms={self.debounce_ms}")
+        except FileNotFoundError:
+            logger.info("No saved config found, using defaults")
         except Exception as e:
             logger.warning(f"Could not load config: {e}")
     
     def _save_config(self):
+        """Persist the configuration unless the file already holds it"""
+        self._config_dirty = False
+        snapshot = (self.mode, self._manual_override, self.gpio_pin, self.debounce_ms)
+        if snapshot == self._last_saved:
+            return
+        if self._write_config(snapshot):
+            self._last_saved = snapshot
+    
+    def _write_config(self, snapshot: tuple) -> bool:
         """Save configuration to file"""
         try:
-            config = {
-                'mode': self.mode.value,
-                'manual_override': self._manual_override,
-                'gpio_pin': self.gpio_pin
-            }
-            with open(self.config_file, 'w') as f:
-                json.dump(config, f, indent=2)
+            mode, manual_override, gpio_pin, debounce_ms = snapshot
+            config = (f"mode={mode}\nmanual_override={int(manual_override)}\n"
+                      f"gpio_pin={gpio_pin}\ndebounce_ms={debounce_ms}\n")
+            if self._cfg_name is None:
+                self._open_config_dir()
+            
+            # Write to a temporary file and rename over the original so a
+            # crash mid-write can never leave a truncated config behind
+            tmp_name = self._cfg_name + ".tmp"
+            fd = os.open(tmp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644,
+                         dir_fd=self._cfg_dir_fd)
+            try:
+                os.write(fd, config.encode())
+            finally:
+                os.close(fd)
+            os.replace(tmp_name, self._cfg_name,
+                       src_dir_fd=self._cfg_dir_fd, dst_dir_fd=self._cfg_dir_fd)
             logger.info("Configuration saved")
+            return True
         except Exception as e:
             logger.error(f"Could not save config: {e}")
+            return False
+    
+    def _open_config_dir(self):
+        """Keep the config directory open so saves only resolve the file name"""
+        config_path = os.path.abspath(self.config_file)
+        if os.open in os.supports_dir_fd and os.replace in os.supports_dir_fd:
+            self._cfg_dir_fd = os.open(os.path.dirname(config_path), os.O_RDONLY)
+            self._cfg_name = os.path.basename(config_path)
+        else:
+            self._cfg_dir_fd = None
+            self._cfg_name = config_path
     
     def _update_gpio_output(self):
         """Update GPIO output based on current e-stop state and mode"""
-        if self._gpio_device is None:
+        if self._write_level is None:
             logger.debug("No GPIO device available, skipping output update")
             return
         
         try:
             # Determine what the GPIO output should be
-            estop_active = self._manual_override or self._current_state == EStopState.ACTIVE
-            
-            if self.mode == EStopMode.NC:
-                # Normally Closed: Output HIGH when inactive, LOW when active (estop engaged)
-                gpio_output = not estop_active
+            if self._manual_override or self._current_state is EStopState.ACTIVE:
+                gpio_output = self._out_for_active
             else:
-                # Normally Open: Output LOW when inactive, HIGH when active (estop engaged)  
-                gpio_output = estop_active
+                gpio_output = self._out_for_inactive
+            
+            # The pin is ours alone, so an unchanged level needs no write
+            if gpio_output == self._last_level:
+                return
             
             # Set the GPIO output
-            if gpio_output:
-                self._gpio_device.on()
-                logger.debug(f"GPIO pin {self.gpio_pin} set to HIGH")
-            else:
-                self._gpio_device.off()
-                logger.debug(f"GPIO pin {self.gpio_pin} set to LOW")
+            self._write_level(gpio_output)
+            self._last_level = gpio_output
+            logger.debug("GPIO pin %d set to %s", self.gpio_pin, "HIGH" if gpio_output else "LOW")
                 
         except Exception as e:
             logger.error(f"Error updating GPIO output: {e}")
 
     def _read_gpio_state(self) -> bool:
         """Read current GPIO output state"""
-        if self._gpio_device is None:
+        if self._read_level is None:
             # Simulate GPIO for testing - return state based on manual override
             if self.mode == EStopMode.NC:
                 return not self._manual_override
@@ -189,11 +487,21 @@ class EStopManager:
                 return self._manual_override
         
         try:
-            return self._gpio_device.is_active
+            return bool(self._read_level())
         except Exception as e:
             logger.error(f"Error reading GPIO: {e}")
             return False
     
+    def _notify_change(self, previous: EStopState):
+        """Invoke the when_changed callback if the state moved away from previous"""
+        if self._current_state == previous or self.when_changed is None:
+            return
+        
+        try:
+            self.when_changed(self._current_state)
+        except Exception as e:
+            logger.error(f"Error in state change callback: {e}")
+    
     def get_estop_state(self) -> EStopState:
         """
         Get current e-stop state based on GPIO reading and configuration
@@ -204,17 +512,30 @@ class EStopManager:
         if self._manual_override:
             return EStopState.ACTIVE
         
-        gpio_active = self._read_gpio_state()
+        return self._compute_state(self._read_gpio_state())
+    
+    def _compute_state(self, gpio_active: bool) -> EStopState:
+        """Interpret a GPIO reading as an e-stop state, applying override and debounce"""
+        if self._manual_override:
+            return EStopState.ACTIVE
         
         # Interpret GPIO state based on wiring mode
-        if self.mode == EStopMode.NC:
-            # Normally Closed: Active when GPIO goes low (circuit broken)
-            estop_active = not gpio_active
-        else:
-            # Normally Open: Active when GPIO goes high (circuit closed)
-            estop_active = gpio_active
+        state = _STATE_TABLE[gpio_active ^ self._nc_bit]
+        if state is self._current_state:
+            return state
         
-        self._current_state = EStopState.ACTIVE if estop_active else EStopState.INACTIVE
+        # Contact bounce: reject transitions too close to the last accepted
+        # one. A read-back of the level we drove ourselves is never bounce,
+        # and rejecting it would leave the state stale until the next read
+        now = time.monotonic()
+        if (self._read_level is not None and gpio_active != self._last_level
+                and now - self._last_transition < self._debounce_s):
+            return self._current_state
+        self._last_transition = now
+        
+        previous = self._current_state
+        self._current_state = state
+        self._notify_change(previous)
         return self._current_state
     
     def activate_estop(self) -> bool:
@@ -226,9 +547,13 @@ class EStopManager:
         """
         try:
             self._manual_override = True
+            previous = self._current_state
             self._current_state = EStopState.ACTIVE
             self._update_gpio_output()  # Update GPIO output immediately
+            # Written before returning: a lost activation would bring the
+            # e-stop back up inactive after a restart
             self._save_config()
+            self._notify_change(previous)
             logger.info("E-stop manually activated - GPIO output updated")
             return True
         except Exception as e:
@@ -239,14 +564,20 @@ class EStopManager:
         """
         Reset/clear e-stop state (remove manual override)
         
+        Persisting the cleared override is deferred to the next config save
+        or cleanup(); if the process dies first, the e-stop comes back up
+        active, which is the safe direction.
+        
         Returns:
             True if successfully reset
         """
         try:
             self._manual_override = False
+            previous = self._current_state
             self._current_state = EStopState.INACTIVE
             self._update_gpio_output()  # Update GPIO output immediately
-            self._save_config()
+            self._config_dirty = True
+            self._notify_change(previous)
             logger.info("E-stop reset (manual override cleared) - GPIO output updated")
             return True
         except Exception as e:
@@ -265,13 +596,38 @@ class EStopManager:
         """
         try:
             self.mode = mode
+            self._apply_mode()
+            self._refresh_status_template()
             self._save_config()
-            logger.info(f"E-stop mode set to {mode.value}")
+            logger.info(f"E-stop mode set to {mode}")
             return True
         except Exception as e:
             logger.error(f"Failed to set mode: {e}")
             return False
     
+    def set_debounce(self, debounce_ms: int) -> bool:
+        """
+        Set the GPIO transition debounce window
+        
+        Args:
+            debounce_ms: Debounce window in milliseconds (0 disables debouncing)
+            
+        Returns:
+            True if successfully set
+        """
+        try:
+            if debounce_ms < 0:
+                raise ValueError(f"debounce_ms must be >= 0, got {debounce_ms}")
+            self.debounce_ms = debounce_ms
+            self._debounce_s = debounce_ms / 1000.0
+            self._refresh_status_template()
+            self._save_config()
+            logger.info(f"E-stop debounce set to {debounce_ms} ms")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to set debounce: {e}")
+            return False
+    
     def get_status(self) -> dict:
         """
         Get comprehensive status information
@@ -279,71 +635,73 @@ class EStopManager:
         Returns:
             Dictionary with status information
         """
-        current_state = self.get_estop_state()
-        gpio_state = self._read_gpio_state()
+        gpio_active = self._read_gpio_state()
         
-        # Detect Pi model for optimization info
-        pi_model = "Unknown"
-        try:
-            with open('/proc/cpuinfo', 'r') as f:
-                cpuinfo = f.read()
-                if 'BCM2712' in cpuinfo:  # Pi 5 processor
-                    pi_model = "Raspberry Pi 5"
-                elif 'BCM2711' in cpuinfo:  # Pi 4 processor  
-                    pi_model = "Raspberry Pi 4"
-                elif 'BCM' in cpuinfo:
-                    pi_model = "Raspberry Pi (older model)"
-        except:
-            if platform.system() == "Darwin":
-                pi_model = "macOS (simulation)"
-            else:
-                pi_model = "Non-Pi system"
+        current_state = self._compute_state(gpio_active)
         
-        return {
-            'estop_state': current_state.value,
-            'gpio_pin': self.gpio_pin,
-            'gpio_active': gpio_state,
-            'mode': self.mode.value,
-            'manual_override': self._manual_override,
-            'gpio_available': self._gpio_device is not None,
-            'pi_model': pi_model,
-            'pi5_optimized': _PI5_OPTIMIZED,
-            'gpio_backend': str(type(Device.pin_factory).__name__) if Device.pin_factory else "None"
-        }
+        status = self._status_template.copy()
+        status['estop_state'] = current_state
+        status['is_active'] = current_state is EStopState.ACTIVE
+        status['gpio_active'] = gpio_active
+        status['manual_override'] = self._manual_override
+        return status
     
     def cleanup(self):
         """Clean up GPIO resources and set safe state"""
-        if self._gpio_device:
+        if self._write_level is not None:
             try:
                 # Before cleanup, set GPIO to safe state (e-stop active)
                 logger.info("Setting GPIO to safe state before cleanup...")
                 self._set_safe_state()
                 
-                # Brief delay to ensure state is set
-                import time
-                time.sleep(0.1)
-                
-                self._gpio_device.close()
-                logger.info("GPIO resources cleaned up after setting safe state")
+                # Confirm the pin reached the safe level before releasing it
+                self._wait_for_level(self._out_for_active)
             except Exception as e:
                 logger.error(f"Error during cleanup: {e}")
+            finally:
+                # Released even when the safe state failed, so the line is
+                # never left claimed by a process that is shutting down
+                try:
+                    self._release_gpio()
+                    logger.info("GPIO resources cleaned up after setting safe state")
+                except Exception as e:
+                    logger.error(f"Error releasing GPIO: {e}")
+        
+        # Flush a deferred reset before releasing the directory; read-only
+        # use (status) never writes the config
+        if self._config_dirty:
+            self._save_config()
+        if self._cfg_dir_fd is not None:
+            os.close(self._cfg_dir_fd)
+            self._cfg_dir_fd = None
+            self._cfg_name = None
+    
+    def _wait_for_level(self, level: bool) -> bool:
+        """Spin until the pin reads back level, for at most _SETTLE_TIMEOUT_NS"""
+        deadline = time.monotonic_ns() + _SETTLE_TIMEOUT_NS
+        try:
+            while bool(self._read_level()) != level:
+                if time.monotonic_ns() >= deadline:
+                    logger.warning(f"GPIO pin {self.gpio_pin} did not settle at the safe level")
+                    return False
+        except Exception as e:
+            logger.error(f"Error reading back GPIO pin {self.gpio_pin}: {e}")
+            return False
+        return True
     
     def _set_safe_state(self):
         """Set GPIO to safe state (e-stop active) for shutdown"""
-        if self._gpio_device is None:
+        if self._write_level is None:
             logger.debug("No GPIO device available, skipping safe state setting")
             return
             
         try:
-            # Safe state = e-stop active
-            if self.mode == EStopMode.NC:
-                # NC Mode: Safe state is LOW (e-stop active)
-                self._gpio_device.off()
-                logger.info("Set safe state: GPIO pin LOW (NC mode - e-stop active)")
-            else:
-                # NO Mode: Safe state is HIGH (e-stop active)  
-                self._gpio_device.on()
-                logger.info("Set safe state: GPIO pin HIGH (NO mode - e-stop active)")
-                
+            # Safe state = e-stop active: LOW in NC mode, HIGH in NO mode
+            level = self._out_for_active
+            self._write_level(level)
+            self._last_level = level
+            logger.info(f"Set safe state: GPIO pin {'HIGH' if level else 'LOW'} "
+                        f"({self.mode.upper()} mode - e-stop active)")
+            
         except Exception as e:
             logger.error(f"Error setting safe state: {e}")
@@ -0,0 +1,31 @@
+"""
+Tests for the CLI monitor's adaptive re-check interval
+"""
+import unittest
+from collections import deque
+
+from app.cli import _MONITOR_POLL_MAX, _MONITOR_POLL_MIN, _next_poll_interval
+
+
+class TestNextPollInterval(unittest.TestCase):
+
+    def test_doubles_while_idle(self):
+        self.assertEqual(_next_poll_interval(_MONITOR_POLL_MIN, deque()), _MONITOR_POLL_MIN * 2)
+
+    def test_capped_at_maximum(self):
+        interval = _MONITOR_POLL_MIN
+        for _ in range(20):
+            interval = _next_poll_interval(interval, deque())
+        self.assertEqual(interval, _MONITOR_POLL_MAX)
+
+    def test_capped_at_half_the_mean_change_interval(self):
+        changes = deque([0.2, 0.6])
+        self.assertEqual(_next_poll_interval(1.0, changes), 0.2)
+
+    def test_cap_never_below_minimum(self):
+        changes = deque([0.001, 0.001])
+        self.assertEqual(_next_poll_interval(_MONITOR_POLL_MIN, changes), _MONITOR_POLL_MIN)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+Tests for the EStopManager config file, board detection and debounce
+
+GPIO libraries are stubbed out so every manager runs in simulation mode and
+no test ever drives a real pin.
+"""
+import json
+import logging
+import os
+import struct
+import tempfile
+import unittest
+from unittest import mock
+
+from src.e_stop_manager import e_stop_manager as esm
+from src.e_stop_manager import EStopManager, EStopMode, EStopState
+
+
+def setUpModule():
+    # Simulation fallback logs the stubbed-out import failure as an error
+    logging.disable(logging.CRITICAL)
+
+
+def tearDownModule():
+    logging.disable(logging.NOTSET)
+
+
+class SimulatedManagerTestCase(unittest.TestCase):
+    """Base class running managers without lgpio or gpiozero, with a temporary HOME"""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = tmp.name
+        self.config_file = os.path.join(self.home, 'estop_config')
+
+        for patcher in (
+            mock.patch.dict(os.environ, {'HOME': self.home}),
+            mock.patch.object(esm, 'lgpio', None),
+            mock.patch.object(esm, '_import_gpio', lambda: None),
+            mock.patch.object(esm, '_import_gpiozero', side_effect=ImportError("gpiozero")),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_manager(self, **kwargs) -> EStopManager:
+        kwargs.setdefault('config_file', self.config_file)
+        manager = EStopManager(**kwargs)
+        self.addCleanup(manager.cleanup)
+        return manager
+
+    def write_config(self, text: str, path: str = None):
+        with open(path or self.config_file, 'w') as f:
+            f.write(text)
+
+    def read_config(self, path: str = None) -> str:
+        with open(path or self.config_file) as f:
+            return f.read()
+
+
+class TestConfigFile(SimulatedManagerTestCase):
+
+    def test_round_trip(self):
+        manager = self.make_manager()
+        self.assertTrue(manager.set_mode(EStopMode.NO))
+        self.assertTrue(manager.set_debounce(35))
+        self.assertTrue(manager.activate_estop())
+        self.assertEqual(self.read_config(),
+                         "mode=no\nmanual_override=1\ngpio_pin=4\ndebounce_ms=35\n")
+
+        reloaded = self.make_manager()
+        self.assertIs(reloaded.mode, EStopMode.NO)
+        self.assertEqual(reloaded.debounce_ms, 35)
+        self.assertIs(reloaded.get_estop_state(), EStopState.ACTIVE)
+
+    def test_unchanged_config_is_not_rewritten(self):
+        manager = self.make_manager()
+        manager.set_mode(EStopMode.NO)
+        os.remove(self.config_file)
+        manager.set_mode(EStopMode.NO)
+        self.assertFalse(os.path.exists(self.config_file))
+
+    def test_malformed_lines_are_ignored(self):
+        config = esm._parse_config(b"mode=no\ngarbage\n=1\nunknown=1\n\n debounce_ms = 15 \n")
+        self.assertEqual(config, {'mode': EStopMode.NO, 'debounce_ms': 15})
+
+    def test_invalid_values_fall_back_to_defaults(self):
+        for text in ("mode=maybe\n", "debounce_ms=soon\n", "debounce_ms=-5\n"):
+            with self.subTest(text=text):
+                self.write_config(text)
+                manager = self.make_manager()
+                self.assertIs(manager.mode, EStopMode.NC)
+                self.assertEqual(manager.debounce_ms, esm._DEFAULT_DEBOUNCE_MS)
+
+    def test_explicit_debounce_wins_over_config(self):
+        self.write_config("debounce_ms=55\n")
+        self.assertEqual(self.make_manager().debounce_ms, 55)
+        self.assertEqual(self.make_manager(debounce_ms=7).debounce_ms, 7)
+
+    def test_legacy_json_is_read_then_rewritten(self):
+        legacy_file = os.path.join(self.home, '.estop_config.json')
+        new_file = os.path.join(self.home, '.estop_config')
+        self.write_config(json.dumps({'mode': 'no', 'manual_override': True, 'debounce_ms': 30}),
+                          legacy_file)
+
+        manager = self.make_manager(config_file=None)
+        self.assertIs(manager.mode, EStopMode.NO)
+        self.assertEqual(manager.debounce_ms, 30)
+        self.assertIs(manager.get_estop_state(), EStopState.ACTIVE)
+        self.assertFalse(os.path.exists(new_file))
+
+        # Nothing changed, but the legacy file still has to be converted
+        manager.set_mode(EStopMode.NO)
+        self.assertEqual(self.read_config(new_file),
+                         "mode=no\nmanual_override=1\ngpio_pin=4\ndebounce_ms=30\n")
+
+
+class TestBoardRevision(unittest.TestCase):
+
+    def setUp(self):
+        esm._board_revision.cache_clear()
+        self.addCleanup(esm._board_revision.cache_clear)
+
+    def board_revision(self, device_tree: bytes = None, cpuinfo: str = None):
+        def fake_open(path, mode='r'):
+            if path == '/proc/device-tree/system/linux,revision' and device_tree is not None:
+                return mock.mock_open(read_data=device_tree)()
+            if path == '/proc/cpuinfo' and cpuinfo is not None:
+                return mock.mock_open(read_data=cpuinfo)()
+            raise FileNotFoundError(path)
+
+        with mock.patch.object(esm, 'open', fake_open, create=True):
+            return esm._board_revision()
+
+    def test_device_tree(self):
+        self.assertEqual(self.board_revision(device_tree=struct.pack('>L', 0xc04170)), 0xc04170)
+
+    def test_cpuinfo_fallback(self):
+        self.assertEqual(self.board_revision(cpuinfo="Hardware\t: BCM2835\nRevision\t: c04170\n"),
+                         0xc04170)
+
+    def test_over_volt_prefix(self):
+        self.assertEqual(self.board_revision(cpuinfo="Revision\t: 1000002\n"), 0x0002)
+
+    def test_not_a_pi(self):
+        self.assertIsNone(self.board_revision(cpuinfo="model name\t: x86\n"))
+        esm._board_revision.cache_clear()
+        self.assertIsNone(self.board_revision())
+
+
+class TestDebounce(SimulatedManagerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.now = 1000.0
+        patcher = mock.patch.object(esm.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # Stand in for a pin whose level we drove HIGH (NC: e-stop released)
+        self.manager = self.make_manager(debounce_ms=20)
+        self.level = True
+        self.manager._read_level = lambda: self.level
+        self.manager._last_level = True
+
+    def read_state(self, level: bool) -> EStopState:
+        self.level = level
+        return self.manager.get_estop_state()
+
+    def test_transition_inside_window_is_rejected(self):
+        self.assertIs(self.read_state(False), EStopState.ACTIVE)
+        self.now += 0.005
+        self.assertIs(self.read_state(True), EStopState.INACTIVE)
+        self.now += 0.005
+        self.assertIs(self.read_state(False), EStopState.INACTIVE)
+        self.now += 0.020
+        self.assertIs(self.read_state(False), EStopState.ACTIVE)
+
+    def test_read_back_of_driven_level_is_not_debounced(self):
+        self.assertIs(self.read_state(False), EStopState.ACTIVE)
+        self.now += 0.001
+        self.assertIs(self.read_state(True), EStopState.INACTIVE)
+
+    def test_zero_disables_debounce(self):
+        self.manager.set_debounce(0)
+        self.assertIs(self.read_state(False), EStopState.ACTIVE)
+        self.manager._last_level = False
+        self.assertIs(self.read_state(True), EStopState.INACTIVE)
+        self.assertIs(self.read_state(False), EStopState.ACTIVE)
+
+
+if __name__ == '__main__':
+    unittest.main()